@@ -1,3 +1,7 @@
+import sys
+from bisect import bisect_left
+from functools import lru_cache
+
 from state import State
 
 
@@ -12,12 +16,14 @@ def load_election(filename):
     Returns:
     a list of State instances
     """
+    with open(filename, 'r') as data:
+        lines = data.read().splitlines()
     states = []
-    data = open(filename, 'r')
-    data.readline()
-    for line in data:
-        state_data = line.split("\t", 3)
-        states.append(State(state_data[0], state_data[1], state_data[2], state_data[3]))
+    # Skipping the header line and any blank lines
+    for line in lines[1:]:
+        if line:
+            name, dem, rep, ec = line.split("\t", 3)
+            states.append(State(name, dem, rep, ec))
     return states
 
 
@@ -45,22 +51,38 @@ def election_winner(election):
         return ('rep', 'dem')
 
 
-def winner_states(election):
+def _partition(election):
     """
-    Finds the list of States that were won by the winning candidate (lost by the losing candidate).
+    Splits the election into the States won by the winning candidate and the
+    States won by the losing candidate, in a single pass.
 
     Parameters:
     election - a list of State instances
 
     Returns:
-    A list of State instances won by the winning candidate
+    a tuple (winner_states, loser_states) of lists of State instances
     """
-    winner_states = []
     winner = election_winner(election)[0]
+    won, lost = [], []
     for state in election:
         if state.get_winner() == winner:
-            winner_states.append(state)
-    return winner_states
+            won.append(state)
+        else:
+            lost.append(state)
+    return won, lost
+
+
+def winner_states(election):
+    """
+    Finds the list of States that were won by the winning candidate (lost by the losing candidate).
+
+    Parameters:
+    election - a list of State instances
+
+    Returns:
+    A list of State instances won by the winning candidate
+    """
+    return _partition(election)[0]
 
 
 def ec_votes_to_flip(election, total=538):
@@ -75,66 +97,45 @@ def ec_votes_to_flip(election, total=538):
     Returns:
     int, number of additional EC votes required by the loser to change the election outcome
     """
-    loser_votes = 0
-    winners_states = winner_states(election)
-    for state in election:
-        if state not in winners_states:
-            loser_votes += state.get_ecvotes()
+    loser_votes = sum(state.get_ecvotes() for state in _partition(election)[1])
     votes_to_flip = (total/2 + 1) - loser_votes
     return int(votes_to_flip)
 
 
 def combinations(L):
     """
-    Helper function to generate powerset of all possible combinations
-    of items in input list L. E.g., if
-    L is [1, 2] it will return a list with elements
-    [], [1], [2], and [1,2].
+    Helper function to compute the total EC votes and total margin of every
+    possible combination of items in input list L. Each combination is
+    encoded as an int bitmask, where bit j is set if L[j] is in the
+    combination. E.g., if L is [A, B], mask 0 is [], 1 is [A], 2 is [B]
+    and 3 is [A, B].
+
+    The totals are filled in by doubling: the totals for masks that include
+    L[j] are the totals for masks below 2^j, shifted by L[j]'s EC votes and
+    margin, so every total costs a single addition.
 
     Parameters:
-    L - list of items
+    L - list of State instances
 
     Returns:
-    a list of lists that contains all possible
-    combinations of the elements of L
+    a tuple (ec_sums, margin_sums) of lists of length 2^len(L), indexed by mask
     """
+    ec_sums, margin_sums = [0], [0]
+    for state in L:
+        ec, margin = state.get_ecvotes(), state.get_margin()
+        ec_sums += [ec_sum + ec for ec_sum in ec_sums]
+        margin_sums += [margin_sum + margin for margin_sum in margin_sums]
+    return ec_sums, margin_sums
 
-    def get_binary_representation(n, num_digits):
-        """
-        Inner function to get a binary representation of items to add to a subset,
-        which combinations() uses to construct and append another item to the powerset.
-
-        Parameters:
-        n and num_digits are non-negative ints
-
-        Returns:
-            a num_digits str that is a binary representation of n
-        """
-        result = ''
-        while n > 0:
-            result = str(n%2) + result
-            n = n//2
-        if len(result) > num_digits:
-            raise ValueError('not enough digits')
-        for i in range(num_digits - len(result)):
-            result = '0' + result
-        return result
-
-    powerset = []
-    for i in range(0, 2**len(L)):
-        binStr = get_binary_representation(i, len(L))
-        subset = []
-        for j in range(len(L)):
-            if binStr[j] == '1':
-                subset.append(L[j])
-        powerset.append(subset)
-    return powerset
 
 def brute_force_swing_states(winner_states, ec_votes):
     """
     Finds a subset of winner_states that would change an election outcome if
-    voters moved into those states, these are our swing states. Iterate over
-    all possible move combinations using the helper function combinations(L).
+    voters moved into those states, these are our swing states. Rather than
+    checking all 2^N move combinations, splits winner_states into two halves,
+    computes the totals for every combination of each half with combinations(L),
+    and pairs every combination of the first half with the cheapest combination
+    of the second half that supplies the remaining EC votes (meet-in-the-middle).
     Return the move combination that minimises the number of voters moved. If
     there exists more than one combination that minimises this, return any one of them.
 
@@ -147,42 +148,95 @@ def brute_force_swing_states(winner_states, ec_votes):
     voters relocated to those states
     The empty list, if no possible swing states
     """
-    best_combo = []
+    half = len(winner_states)//2
+    a_ec_sums, a_margin_sums = combinations(winner_states[:half])
+    b_ec_sums, b_margin_sums = combinations(winner_states[half:])
+    b_masks = sorted(range(len(b_ec_sums)), key=b_ec_sums.__getitem__)
+    b_ec_sorted = [b_ec_sums[mask] for mask in b_masks]
+    # suffix_min[i] is the mask in b_masks[i:] moving the fewest voters
+    suffix_min = [0]*len(b_masks)
+    best = b_masks[-1]
+    for i in range(len(b_masks) - 1, -1, -1):
+        if b_margin_sums[b_masks[i]] <= b_margin_sums[best]:
+            best = b_masks[i]
+        suffix_min[i] = best
+    best_a, best_b = None, None
     min_voters = None
-    possible_move_combinations = combinations(winner_states)
-    for combo in possible_move_combinations:
-        flipped_votes = 0
-        moved_voters = 0
-        for state in combo:
-            flipped_votes += state.get_ecvotes()
-            moved_voters += state.get_margin()
-        if flipped_votes >= ec_votes and (min_voters == None or moved_voters < min_voters):
-            best_combo = combo
+    for a_mask in range(len(a_ec_sums)):
+        i = bisect_left(b_ec_sorted, ec_votes - a_ec_sums[a_mask])
+        if i == len(b_masks):
+            continue
+        b_mask = suffix_min[i]
+        moved_voters = a_margin_sums[a_mask] + b_margin_sums[b_mask]
+        if min_voters is None or moved_voters < min_voters:
+            best_a, best_b = a_mask, b_mask
             min_voters = moved_voters
+    if min_voters is None:
+        return []
+    # Decoding the winning pair of masks back into states
+    best_combo = [winner_states[j] for j in range(half) if best_a >> j & 1]
+    best_combo += [winner_states[half+j] for j in range(len(winner_states)-half) if best_b >> j & 1]
     return best_combo
 
 
-def access_memo(key_tuple, solution, memo = {}):
+def _knapsack_kernel(weights, values, cap):
     """
+    Fills the 0/1 knapsack table used by move_max_voters. Works on plain
+    ints only, so no State instances are touched inside the loops.
 
     Parameters:
-        A function to pass a dictionary into move_max_voters for memoization.
-        
-    key_tuple - (int, int) tuple indicating the key to be searched for in memo
-    solution - list, the solution associated with the current len(winner_states) 
-    and limit ec_votes. None if a solution is being newly added to memo
-    memo - dict, default argument to allow for modification
+    weights - list of ints, the weight (EC votes) of each item
+    values - list of ints, the value (voters displaced) of each item
+    cap - int, the weight limit
+
     Returns:
-    A list for solution associated with memo[key_tuple], returns None if a solution 
-    is being newly added.
+    a tuple (best, taken) where best[c] is the largest value reachable with
+    a weight of at most c, and taken[i][c] is True if item i improved best[c]
     """
-    if key_tuple in memo and solution == None:
-        return memo[key_tuple]
-    elif key_tuple not in memo and solution == None:
-        return None
-    else:
-        memo[key_tuple] = solution
-        return None
+    best = [0]*(cap+1)
+    taken = []
+    for i in range(len(weights)):
+        weight, value = weights[i], values[i]
+        row = [False]*(cap+1)
+        # Sweeping capacities right to left so each item is used at most once
+        for c in range(cap, weight-1, -1):
+            candidate = best[c-weight] + value
+            if candidate > best[c]:
+                best[c] = candidate
+                row[c] = True
+        taken.append(row)
+    return best, taken
+
+
+def _min_knapsack_kernel(weights, values, target):
+    """
+    Fills the minimum-cost knapsack table used by move_min_voters. Like
+    _knapsack_kernel, it works on plain ints only.
+
+    Parameters:
+    weights - list of ints, the weight (EC votes) of each item
+    values - list of ints, the cost (voters displaced) of each item
+    target - int, the weight that must be reached
+
+    Returns:
+    a tuple (least, taken) where least[c] is the smallest cost reaching a weight
+    of at least c (None if unreachable), and taken[i][c] is True if item i
+    lowered least[c]
+    """
+    least = [0] + [None]*target
+    taken = []
+    for i in range(len(weights)):
+        weight, value = weights[i], values[i]
+        row = [False]*(target+1)
+        # Weights past the target all count as reaching it, hence the max(0, ...)
+        for c in range(target, 0, -1):
+            prev = least[max(0, c-weight)]
+            if prev is not None and (least[c] is None or prev + value < least[c]):
+                least[c] = prev + value
+                row[c] = True
+        taken.append(row)
+    return least, taken
+
 
 def move_max_voters(winner_states, ec_votes):
     """
@@ -195,6 +249,12 @@ def move_max_voters(winner_states, ec_votes):
         is less than or equal to the given limit(ec_votes) and the total value(voters displaced)
         is as large as possible.
 
+    Solved bottom-up with _knapsack_kernel, then the chosen states are
+    recovered by walking back through its taken table. The table is filled
+    iteratively rather than recursively: a recursive solution pays for a
+    Python call frame per subproblem and runs into the interpreter's recursion
+    limit for long lists of states (see _move_max_voters_recursive).
+
     Parameters:
     winner_states - a list of State instances that were won by the winner
     ec_votes - int, the maximum number of EC votes
@@ -204,40 +264,67 @@ def move_max_voters(winner_states, ec_votes):
     to these states in order to get at most ec_votes
     The empty list, if every state has a # EC votes greater than ec_votes
     """
-    # Initializing dictionary memo within the function for memoization
-    # Checking if a dictionary entry already exists for the current list of states and weight limit
-    if type(access_memo((len(winner_states), ec_votes), None)) is list:
-        solution = access_memo((len(winner_states), ec_votes), None)
-    #Base case; winner states list is empty/weight limit is 0, solution list is empty and total value is 0
-    elif winner_states == [] or ec_votes == 0:
-        solution = ()
-    #Check if current state should be neglected from the list if its weight is greater than the weight limit
-    elif winner_states[0].get_ecvotes() > ec_votes:
-        #Proceed with a recursive call on the remaining states
-        solution = move_max_voters(winner_states[1:], ec_votes)
-    else:
-        next_state = winner_states[0]
-        new_weight_lim = ec_votes - next_state.get_ecvotes()
-        # "Left" option recursive call; passing list of remaining states and updated
-        # weight limit of (original weight limit - weight of current state) as params
-        with_state = move_max_voters(winner_states[1:], new_weight_lim)
-        val = sum([state.get_margin()+1 for state in with_state]) + (next_state.get_margin()+1)
-        # "Right" option recursive call; passing list of remaining states and original 
-        # weight limit as params; not adding next_state to the list
-        no_state = move_max_voters(winner_states[1:], ec_votes)
-        stateless_val = sum([state.get_margin()+1 for state in no_state])
-        # Choosing the solution list with a larger value of displaced voters
-        if val > stateless_val:
-            solution = tuple(with_state) + (next_state,)
-        else:
-            solution = no_state
-    access_memo((len(winner_states), ec_votes), list(solution))
-    #print("Iteration")
-    #print(list(solution))
-    return list(solution)
-    
-        
-        
+    if ec_votes <= 0:
+        return []
+    weights = [state.get_ecvotes() for state in winner_states]
+    values = [state.get_margin()+1 for state in winner_states]
+    _, taken = _knapsack_kernel(weights, values, ec_votes)
+    # Walking back through the table to recover the states that were taken
+    solution = []
+    cap = ec_votes
+    for i in range(len(winner_states)-1, -1, -1):
+        if taken[i][cap]:
+            solution.append(winner_states[i])
+            cap -= weights[i]
+    return solution
+
+
+def _move_max_voters_recursive(winner_states, ec_votes):
+    """
+    Top-down version of move_max_voters, kept as a reference to check the
+    bottom-up table against. Memoizes on (index, remaining EC votes) with
+    functools.lru_cache, so the cache only lives as long as this call.
+    That is up to N*W entries for N states and W = ec_votes, each holding a
+    tuple of chosen indices, so it is meant for cross-checks only.
+
+    Parameters:
+    winner_states - a list of State instances that were won by the winner
+    ec_votes - int, the maximum number of EC votes
+
+    Returns:
+    A list of State instances, as for move_max_voters
+    """
+    weights = [state.get_ecvotes() for state in winner_states]
+    values = [state.get_margin()+1 for state in winner_states]
+
+    @lru_cache(maxsize=None)
+    def best_from(i, cap):
+        """
+        Returns:
+        a tuple (value, chosen) for the best choice among states i onwards with
+        at most cap EC votes, where chosen is a tuple of indices into winner_states
+        """
+        if i == len(weights) or cap <= 0:
+            return 0, ()
+        if weights[i] > cap:
+            return best_from(i+1, cap)
+        with_value, with_chosen = best_from(i+1, cap-weights[i])
+        with_value += values[i]
+        without_value, without_chosen = best_from(i+1, cap)
+        if with_value > without_value:
+            return with_value, with_chosen + (i,)
+        return without_value, without_chosen
+
+    # Each state adds a level of recursion (two frames with the cache wrapper),
+    # so raising the limit for the duration of the call if the default is too low
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, 2*len(winner_states) + 100))
+    try:
+        _, chosen = best_from(0, ec_votes)
+    finally:
+        sys.setrecursionlimit(old_limit)
+    return [winner_states[i] for i in chosen]
+
 
 def move_min_voters(winner_states, ec_votes_needed):
     """
@@ -246,6 +333,9 @@ def move_min_voters(winner_states, ec_votes_needed):
     Only return states that were originally won by the winner (lost by the loser)
     of the election.
 
+    Solved directly as a minimum-cost knapsack with _min_knapsack_kernel, so the
+    swing states come out of the table without going through move_max_voters.
+
     Parameters:
     winner_states - a list of State instances that were won by the winner
     ec_votes_needed - int, number of EC votes needed to change the election outcome
@@ -255,20 +345,22 @@ def move_min_voters(winner_states, ec_votes_needed):
     voters relocated to those states (also can be referred to as our swing states)
     The empty list, if no possible swing states
     """
-        swing_states = []
-    total_votes_won = 0
-    for state in winner_states:
-        total_votes_won += state.get_ecvotes()
-    max_ec_votes = total_votes_won - ec_votes_needed
-    try:
-        non_swing_states = move_max_voters(winner_states, max_ec_votes)
-        for state in winner_states:
-            if state not in non_swing_states:
-                swing_states.append(state)
-    except TypeError:
-        return swing_states
+    if ec_votes_needed <= 0:
+        return []
+    weights = [state.get_ecvotes() for state in winner_states]
+    values = [state.get_margin()+1 for state in winner_states]
+    least, taken = _min_knapsack_kernel(weights, values, ec_votes_needed)
+    if least[ec_votes_needed] is None:
+        return []
+    # Walking back through the table to recover the states that were taken
+    swing_states = []
+    cap = ec_votes_needed
+    for i in range(len(winner_states)-1, -1, -1):
+        if taken[i][cap]:
+            swing_states.append(winner_states[i])
+            cap = max(0, cap-weights[i])
+    swing_states.reverse()
     return swing_states
-    
 
 
 def relocate_voters(election, swing_states, states_with_pride = ['AL', 'AZ', 'CA', 'TX']):
@@ -297,37 +389,37 @@ def relocate_voters(election, swing_states, states_with_pride = ['AL', 'AZ', 'CA
         - an int, the total number of EC votes gained by moving the voters
     None, if it is not possible to sway the election
     """
-      total_moved, flip_map, ec_gain = 0, {}, 0
-    winners_states, losing_states = winner_states(election), []
-    l_margins = []
-    for state in election:
-        if state not in winners_states:
-            losing_states.append(state)
-            l_margins.append(state.get_margin())
+    total_moved, flip_map, ec_gain = 0, {}, 0
+    losing_states = _partition(election)[1]
+    l_margins = [state.get_margin() for state in losing_states]
+    pride = frozenset(states_with_pride)
     try:
         for state in swing_states:
             voters_needed = state.get_margin()+1
+            state_name = state.get_name()
             for i in range(len(losing_states)):
-                if losing_states[i].get_name() in states_with_pride:
+                donor = losing_states[i]
+                donor_name = donor.get_name()
+                if donor_name in pride:
                     continue
                 moved = 0
                 if l_margins[i] == 1:
                     continue
                 elif l_margins[i] > voters_needed:
-                    losing_states[i].subtract_winning_candidate_voters(voters_needed)
+                    donor.subtract_winning_candidate_voters(voters_needed)
                     state.add_losing_candidate_voters(voters_needed)
                     moved += voters_needed
                     total_moved += moved
-                    flip_map[(losing_states[i].get_name(), state.get_name())] = moved
+                    flip_map[(donor_name, state_name)] = moved
                     voters_needed = 0
                     l_margins[i] -= moved
                 else:
-                    losing_states[i].subtract_winning_candidate_voters(l_margins[i]-1)
+                    donor.subtract_winning_candidate_voters(l_margins[i]-1)
                     state.add_losing_candidate_voters(l_margins[i]-1)
                     moved += l_margins[i]-1
                     total_moved += moved
-                    flip_map[(losing_states[i].get_name(), state.get_name())] = moved
-                    voters_needed = voters_needed % moved
+                    flip_map[(donor_name, state_name)] = moved
+                    voters_needed -= moved
                     l_margins[i] = 1
                 if voters_needed == 0:
                     break
@@ -347,7 +439,7 @@ if __name__ == "__main__":
     print(len(election))
     print(election[0])
 
-       winner, loser = election_winner(election)
+    winner, loser = election_winner(election)
     won_states = winner_states(election)
     names_won_states = [state.get_name() for state in won_states]
     reqd_ec_votes = ec_votes_to_flip(election)
@@ -355,7 +447,7 @@ if __name__ == "__main__":
     print("States won by the winner: ", names_won_states)
     print("EC votes needed:",reqd_ec_votes, "\n")
 
-       brute_election = load_election("60002_results.txt")
+    brute_election = load_election("60002_results.txt")
     brute_won_states = winner_states(brute_election)
     brute_ec_votes_to_flip = ec_votes_to_flip(brute_election, total=14)
     brute_swing = brute_force_swing_states(brute_won_states, brute_ec_votes_to_flip)
@@ -365,7 +457,7 @@ if __name__ == "__main__":
     print("Brute force swing states results:", names_brute_swing)
     print("Brute force voters displaced:", voters_brute, "for a total of", ecvotes_brute, "Electoral College votes.\n")
 
-       print("move_max_voters")
+    print("move_max_voters")
     total_lost = sum(state.get_ecvotes() for state in won_states)
     non_swing_states = move_max_voters(won_states, total_lost-reqd_ec_votes)
     non_swing_states_names = [state.get_name() for state in non_swing_states]
@@ -374,7 +466,7 @@ if __name__ == "__main__":
     print("States with the largest margins (non-swing states):", non_swing_states_names)
     print("Max voters displaced:", max_voters_displaced, "for a total of", max_ec_votes, "Electoral College votes.", "\n")
 
-       print("move_min_voters")
+    print("move_min_voters")
     swing_states = move_min_voters(won_states, reqd_ec_votes)
     swing_state_names = [state.get_name() for state in swing_states]
     min_voters_displaced = sum([state.get_margin()+1 for state in swing_states])
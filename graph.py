@@ -1,14 +1,21 @@
+import math
+from array import array
+
+
 class Node():
     """Represents a node in the graph"""
 
-    def __init__(self, name):
+    def __init__(self, name, x=None, y=None):
         """
         Initializes  an instance of Node object.
 
         Parameters:
         name - object representing the name of the node
+        x, y - floats, the coordinates of the node on the map, if known
         """
         self.name = str(name)
+        self.x = x
+        self.y = y
 
     def get_name(self):
         """
@@ -17,6 +24,16 @@ class Node():
         """
         return self.name
 
+    def get_location(self):
+        """
+        Returns:
+        tuple of floats (x, y), the coordinates of the node on the map,
+        None if they are not known
+        """
+        if self.x is None or self.y is None:
+            return None
+        return (self.x, self.y)
+
     def __str__(self):
         """
         This is the function that is called when print(node) is called.
@@ -91,6 +108,8 @@ class DirectedRoad():
         self.travel_time = travel_time
         self.road_type = road_type
         self.traffic_multiplier = traffic_multiplier
+        # Travel time in traffic, computed once since searches ask for it per road visit
+        self.traffic_travel_time = travel_time*traffic_multiplier
 
     def get_source_node(self):
         """
@@ -131,7 +150,7 @@ class DirectedRoad():
         float, representing the time to travel from the source node to the destination node
         """
         if has_traffic:
-            return self.travel_time*self.traffic_multiplier
+            return self.traffic_travel_time
         return self.travel_time
 
     def get_traffic_multiplier(self):
@@ -158,6 +177,136 @@ class DirectedRoad():
         return self.__str__().__hash__()
 
 
+class RoadMapIndex():
+    """
+    A compact, integer-indexed snapshot of a RoadMap for searching.
+    Nodes are numbered 0..n-1 and roads 0..m-1, with the roads leaving each
+    node stored next to each other (compressed sparse row layout), so a search
+    can keep its per-node state in flat arrays instead of Node-keyed dicts.
+    """
+
+    def __init__(self, roadmap):
+        """
+        Parameters:
+        roadmap - RoadMap to index
+
+        Attributes:
+        self.nodes - list of Node, the node with each id
+        self.node_ids - dict of Node -> int, the id of each node
+        self.out_start - array of int, the roads leaving node i are road ids
+            out_start[i] up to (not including) out_start[i+1]
+        self.road_src - array of int, the source node id of each road
+        self.road_dest - array of int, the destination node id of each road
+        self.road_time - array of float, the travel time of each road
+        self.road_traffic_time - array of float, the travel time of each road in traffic
+        self.road_type_names - list of str, the distinct road types, indexed by type code
+        self.road_type_code - array of int, the road type code of each road
+        self.node_x, self.node_y - arrays of float, the coordinates of each node
+        self.has_locations - bool, True if every node has coordinates
+        self.in_start - array of int, the roads ending at node i are
+            in_roads[in_start[i]] up to (not including) in_roads[in_start[i+1]]
+        self.in_roads - array of int, road ids grouped by destination node
+        """
+        self.nodes = list(roadmap.nodes_to_roads)
+        self.node_ids = {node: i for i, node in enumerate(self.nodes)}
+        locations = [node.get_location() for node in self.nodes]
+        self.has_locations = None not in locations
+        self.node_x = array('d', (location[0] if location else 0.0 for location in locations))
+        self.node_y = array('d', (location[1] if location else 0.0 for location in locations))
+        self.out_start = array('l', [0])
+        self.road_src = array('l')
+        self.road_dest = array('l')
+        self.road_time = array('d')
+        self.road_traffic_time = array('d')
+        self.road_type_names = []
+        self.road_type_code = array('l')
+        type_codes = {}
+        # Reading DirectedRoad attributes directly and binding the appends to local
+        # names, since this runs once per road on every (re)index of the map
+        node_ids = self.node_ids
+        add_src, add_dest = self.road_src.append, self.road_dest.append
+        add_time, add_traffic_time = self.road_time.append, self.road_traffic_time.append
+        add_type_code = self.road_type_code.append
+        for i, node in enumerate(self.nodes):
+            for road in roadmap.nodes_to_roads[node]:
+                add_src(i)
+                add_dest(node_ids[road.dest_node])
+                add_time(road.travel_time)
+                add_traffic_time(road.traffic_travel_time)
+                road_type = road.road_type
+                if road_type not in type_codes:
+                    type_codes[road_type] = len(self.road_type_names)
+                    self.road_type_names.append(road_type)
+                add_type_code(type_codes[road_type])
+            self.out_start.append(len(self.road_src))
+        # Grouping road ids by destination with a counting sort
+        self.in_start = array('l', [0])*(len(self.nodes)+1)
+        for dest in self.road_dest:
+            self.in_start[dest+1] += 1
+        for i in range(len(self.nodes)):
+            self.in_start[i+1] += self.in_start[i]
+        self.in_roads = array('l', [0])*len(self.road_dest)
+        next_slot = self.in_start[:-1]
+        for road_id, dest in enumerate(self.road_dest):
+            self.in_roads[next_slot[dest]] = road_id
+            next_slot[dest] += 1
+        # Road travel times per search configuration, filled in by get_road_times
+        self.road_times = {}
+        # Heuristic scales per search configuration, filled in by get_time_per_distance
+        self.time_per_distance = {}
+
+    def get_road_times(self, restricted_roads, has_traffic=False):
+        """
+        Gets the travel time of every road for one search configuration, where
+        roads of a restricted type take forever to travel (inf). Computed once
+        per configuration, so searches never compare road types per road.
+
+        Parameters:
+        restricted_roads - list of str, road types that cannot be traveled on
+        has_traffic - bool, True if there is traffic, False otherwise
+
+        Returns:
+        array of float, the travel time of each road id
+        """
+        key = (frozenset(restricted_roads), has_traffic)
+        if key not in self.road_times:
+            times = self.road_traffic_time if has_traffic else self.road_time
+            # Deciding once per road type, rather than once per road, whether it is restricted
+            blocked = [road_type in key[0] for road_type in self.road_type_names]
+            self.road_times[key] = array('d', (float('inf') if blocked[code] else time
+                                               for time, code in zip(times, self.road_type_code)))
+        return self.road_times[key]
+
+    def get_time_per_distance(self, restricted_roads, has_traffic=False):
+        """
+        Gets the smallest travel time per unit of straight-line distance over
+        all roads that can be traveled on. Multiplying the straight-line distance
+        between two nodes by this never overestimates the travel time between
+        them, which makes it a valid A* heuristic.
+
+        Parameters:
+        restricted_roads - list of str, road types that cannot be traveled on
+        has_traffic - bool, True if there is traffic, False otherwise
+
+        Returns:
+        float, the smallest travel time per unit of distance,
+        0.0 if some node has no coordinates
+        """
+        key = (frozenset(restricted_roads), has_traffic)
+        if key not in self.time_per_distance:
+            scale = float('inf')
+            if self.has_locations:
+                road_times = self.get_road_times(restricted_roads, has_traffic)
+                for road in range(len(road_times)):
+                    src, dest = self.road_src[road], self.road_dest[road]
+                    distance = math.hypot(self.node_x[dest] - self.node_x[src], self.node_y[dest] - self.node_y[src])
+                    if distance > 0:
+                        scale = min(scale, road_times[road]/distance)
+            # No usable roads (or no coordinates) leaves nothing to scale by
+            self.time_per_distance[key] = scale if scale != float('inf') else 0.0
+        return self.time_per_distance[key]
+
+
 class RoadMap():
     """Represents a road map -> a directed graph of Node and DirectedRoad objects"""
 
@@ -168,6 +317,8 @@ class RoadMap():
         self.nodes = set()
         # must be a dictionary of Node -> list of roads starting at that node
         self.nodes_to_roads = {}
+        # RoadMapIndex built by get_index, reset whenever the map changes
+        self.index = None
 
     def __str__(self):
         """
@@ -214,6 +365,7 @@ class RoadMap():
             raise ValueError("Node already exists in graph.")
         self.nodes.add(node)
         self.nodes_to_roads[node] = []
+        self.index = None
 
     def insert_road(self, road):
         """
@@ -226,6 +378,17 @@ class RoadMap():
         if not (self.contains_node(road.get_source_node()) and self.contains_node(road.get_destination_node())):
             raise ValueError("Source or destination node not in graph.")
         self.nodes_to_roads[road.get_source_node()].append(road)
+        self.index = None
+
+    def get_index(self):
+        """
+        Return:
+        a RoadMapIndex of the RoadMap, built on first use and reused
+        until a node or road is inserted
+        """
+        if self.index is None:
+            self.index = RoadMapIndex(self)
+        return self.index
 
     def get_reachable_roads_from_node(self, node, restricted_roads):
         """
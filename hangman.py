@@ -1,99 +1,95 @@
 import random
 import string
+from functools import lru_cache
 
 # -----------------------------------
 # HELPER CODE
 # -----------------------------------
 
 WORDLIST_FILENAME = "words.txt"
+ALPHABET = frozenset(string.ascii_lowercase)
+VOWELS = frozenset("aeiou")
 
+@lru_cache(maxsize=1)
 def load_words():
     """
-    returns: list, a list of valid words. Words are strings of lowercase letters.    
+    returns: list, a list of valid words. Words are bytes of lowercase ASCII letters.
     
     Depending on the size of the word list, this function may
-    take a while to finish.
+    take a while to finish. The file is read as bytes, skipping the
+    decode step, and the result is cached so it is only read once.
     """
     print("Loading word list from file...")
     # inFile: file
-    inFile = open(WORDLIST_FILENAME, 'r')
-    # line: string
-    line = inFile.readline()
-    # wordlist: list of strings
-    wordlist = line.split()
+    with open(WORDLIST_FILENAME, 'rb') as inFile:
+        # wordlist: list of bytes
+        wordlist = inFile.read().split()
     print("  ", len(wordlist), "words loaded.")
     return wordlist
 
-def choose_word(wordlist):
+def choose_word(wordlist=None):
     """
-    wordlist (list): list of words (strings)
+    wordlist (list): list of words (strings or bytes), defaults to the cached
+        list from load_words, which is only read from disk on first use
     
-    returns: a word from wordlist at random
+    returns: a word (string) from wordlist at random
     """
-    return random.choice(wordlist)
-
-
-# Load the list of words to be accessed from anywhere in the program
-wordlist = load_words()
+    if wordlist is None:
+        wordlist = load_words()
+    word = random.choice(wordlist)
+    # Only the chosen word needs decoding, not the whole list
+    if isinstance(word, bytes):
+        word = word.decode()
+    return word
 
 def has_player_won(secret_word, letters_guessed):
     '''
     secret_word: string, the lowercase word the user is guessing
-    letters_guessed: list (of lowercase letters), the letters that have been
+    letters_guessed: set (of lowercase letters), the letters that have been
         guessed so far
 
     returns: boolean, True if all the letters of secret_word are in letters_guessed,
         False otherwise
     '''
-    won = True
-    for i in secret_word:
-        if i not in letters_guessed:
-            won = False
-    return won
+    return set(secret_word).issubset(letters_guessed)
 
 
 def get_word_progress(secret_word, letters_guessed):
     '''
     secret_word: string, the lowercase word the user is guessing
-    letters_guessed: list (of lowercase letters), the letters that have been
+    letters_guessed: set (of lowercase letters), the letters that have been
         guessed so far
 
     returns: string, comprised of letters and plus signs (+) that represents
         which letters in secret_word have not been guessed so far
     '''
-    progress = []
-    for i in secret_word:
-        if i in letters_guessed:
-            progress.append(i)
-        else:
-            progress.append("+")
-    return ''.join(progress)
+    return ''.join(i if i in letters_guessed else "+" for i in secret_word)
 
 
 def get_available_letters(letters_guessed):
     '''
-    letters_guessed: list (of lowercase letters), the letters that have been
+    letters_guessed: set (of lowercase letters), the letters that have been
         guessed so far
 
     returns: string, comprised of letters that represents which
       letters have not yet been guessed. The letters should be returned in
       alphabetical order
     '''
-    alphabet = list(string.ascii_lowercase)
-    for i in letters_guessed:
-        if i in alphabet:
-            alphabet.remove(i)
-    return ''.join(alphabet)
+    return ''.join(i for i in string.ascii_lowercase if i not in letters_guessed)
     
     
 def get_help(secret_word, available_letters):
-    choose_from = ""
-    for i in available_letters:
-        if i in secret_word:
-            choose_from = choose_from+i
-    hint = random.randint(0, len(choose_from)-1)
-    revealed_letter = choose_from[hint]
-    return revealed_letter
+    '''
+    secret_word: string, the lowercase word the user is guessing
+    available_letters: string, the letters that have not been guessed so far
+
+    returns: string, a random letter of secret_word that has not been guessed
+        yet, or None if there is no such letter
+    '''
+    choose_from = set(secret_word).intersection(available_letters)
+    if not choose_from:
+        return None
+    return random.choice(sorted(choose_from))
     
     
 def hangman(secret_word, with_help):
@@ -136,47 +132,50 @@ def hangman(secret_word, with_help):
     '''
     print("Welcome to Hangman!\n\nI am thinking of a word that is", len(secret_word), "letters long.\n")
     guesses_remaining = 10
-    letters_guessed = []
+    letters_guessed = set()
+    # Letters of secret_word not guessed yet; the player wins once it is empty
+    letters_remaining = set(secret_word)
     while guesses_remaining > 0:
         print("--------------\n\nYou currently have", guesses_remaining, "guesses left.\n\nAvailable letters:", get_available_letters(letters_guessed))
         letter = input("Please guess a letter: ").lower()
         if letter == "!" and with_help is True:
+            revealed_letter = None
             if guesses_remaining >= 3:
                 revealed_letter = get_help(secret_word, get_available_letters(letters_guessed))
-                letters_guessed.append(revealed_letter)
+            if revealed_letter is not None:
+                letters_guessed.add(revealed_letter)
+                letters_remaining.discard(revealed_letter)
                 print("\nLetter revealed: "+revealed_letter+"\n\n"+get_word_progress(secret_word, letters_guessed)+"\n") 
                 guesses_remaining -= 3
-            else:
+            elif guesses_remaining < 3:
                 print("\nOops! Not enough guesses left:", get_word_progress(secret_word, letters_guessed), "\n")
-        elif len(letter) > 1 or letter not in string.ascii_lowercase:
+            else:
+                print("\nOops! There are no letters left to reveal:", get_word_progress(secret_word, letters_guessed), "\n")
+        elif letter not in ALPHABET:
             print("\nOops! That is not a valid letter. Please input a letter from the alphabet:", get_word_progress(secret_word, letters_guessed), "\n")
         elif letter in letters_guessed:
             print("\nOops! You've already guessed that letter:", get_word_progress(secret_word, letters_guessed), "\n")
         else:
-            letters_guessed.append(letter)
+            letters_guessed.add(letter)
+            letters_remaining.discard(letter)
             if letter in secret_word:
                 print("\nGood guess:", get_word_progress(secret_word, letters_guessed), "\n")
             else:
                 print("\nOops! That letter is not in my word:", get_word_progress(secret_word, letters_guessed), "\n")
-                vowels = "aeiou"
-                if letter in vowels:
+                if letter in VOWELS:
                     guesses_remaining -= 2
                 else:
                     guesses_remaining -= 1
-        if has_player_won(secret_word, letters_guessed):
+        if not letters_remaining:
             break
-    if has_player_won(secret_word, letters_guessed):
-        letters = list(secret_word)
-        for i in letters:
-            if letters.count(i) > 1:
-                letters.remove(i)
-        unique_letters = len(letters)
+    if not letters_remaining:
+        unique_letters = len(set(secret_word))
         score = (4*unique_letters*guesses_remaining)+(2*len(secret_word))
         print("--------------\n\nCongratulations, you won!\n\nYour total score for this game is:", score)
     else:
         print("--------------\n\nSorry, you ran out of guesses. The word was "+secret_word+".")
 
 if __name__ == "__main__":
-        secret_word = choose_word(wordlist)
+        secret_word = choose_word()
         with_help = True
         hangman(secret_word, with_help)
@@ -1,5 +1,13 @@
 # Finding shortest paths to drive from home to work on a road network
 
+import heapq
+import math
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
 from graph import DirectedRoad, Node, RoadMap
 
 
@@ -8,7 +16,7 @@ from graph import DirectedRoad, Node, RoadMap
 # Travel times represented as an attribute of the edges, ex: a road (edge) may have 
 # a travel time attribute dictating how long it takes to get from that edge's source to destination node
 
-def load_map(map_filename):
+def load_map(map_filename, locations_filename=None):
     """
     Parses the map file and constructs a road map (graph).
 
@@ -17,6 +25,9 @@ def load_map(map_filename):
     Parameters:
         map_filename : String
             name of the map file
+        locations_filename : String
+            optional name of a file giving the coordinates of the nodes, one
+            node per line in the format: node_name x y
 
     Assumes:
         Each entry in the map file consists of the following format, separated by spaces:
@@ -40,35 +51,65 @@ def load_map(map_filename):
     Returns:
         a directed road map representing the inputted map
     """
-    roads = []
     road_map = RoadMap()
-    # Opening map file
-    map_data = open(map_filename, 'r')
-    # Reading each line of the map file
-    for line in map_data:
-        road_data = line.split(" ", 4)
+    # One shared Node per name, so every road touching a location refers to the same object
+    nodes = {}
+    locations = {}
+    if locations_filename is not None:
+        with open(locations_filename, 'r') as location_data:
+            fields = location_data.read().split()
+        for i in range(0, len(fields) - 2, 3):
+            locations[fields[i]] = (float(fields[i+1]), float(fields[i+2]))
+    # Reading the whole map file at once; every entry is 5 whitespace-separated fields
+    with open(map_filename, 'r') as map_data:
+        fields = map_data.read().split()
+    for i in range(0, len(fields) - 4, 5):
+        src, dest, road_type = fields[i], fields[i+1], fields[i+3]
+        # Adding each location to the road map the first time it appears
+        for name in (src, dest):
+            if name not in nodes:
+                nodes[name] = Node(name, *locations.get(name, (None, None)))
+                road_map.insert_node(nodes[name])
+        src, dest = nodes[src], nodes[dest]
+        # Converting the numeric fields once and reusing them for both directions
+        travel_time, traffic_multiplier = float(fields[i+2]), float(fields[i+4])
+        # Hill roads are downhill on the way back, which takes half as long
+        back_time = travel_time/2 if road_type == 'hill' else travel_time
         # Converting each map entry into 2 DirectedRoad objects
-        # Appending both directed roads to a list of directed roads
-        roads.append(DirectedRoad(Node(road_data[0]), Node(road_data[1]), float(road_data[2]), road_data[3], float(road_data[4])))
-        if road_data[3] == 'hill':
-            roads.append(DirectedRoad(Node(road_data[1]), Node(road_data[0]), float(road_data[2])/2, road_data[3], float(road_data[4])))
-        else:    
-            roads.append(DirectedRoad(Node(road_data[1]), Node(road_data[0]), float(road_data[2]), road_data[3], float(road_data[4])))
-    # Adding each road to the directed road map
-    for road in roads:
-        try:
-            road_map.insert_node(road.get_source_node())
-            road_map.insert_node(road.get_destination_node())
-        except ValueError:
-            try:
-                road_map.insert_node(road.get_destination_node())
-            except ValueError:
-                pass
-        finally:
-            road_map.insert_road(road)
+        # Adding both directed roads to the directed road map
+        road_map.insert_road(DirectedRoad(src, dest, travel_time, road_type, traffic_multiplier))
+        road_map.insert_road(DirectedRoad(dest, src, back_time, road_type, traffic_multiplier))
     return road_map
     
 
+@lru_cache(maxsize=8)
+def _load_map_version(map_filename, modified_time):
+    """
+    Memoized load_map. modified_time is only part of the cache key, so a
+    changed file is loaded again instead of being served from the cache.
+    """
+    return load_map(map_filename)
+
+
+def _load_map_cached(map_filename):
+    """
+    Loads a map file like load_map, but reuses the road map from an earlier
+    call as long as the file has not been modified since. The returned RoadMap
+    is shared between callers and should not be modified.
+
+    Parameters:
+        map_filename : String
+            name of the map file
+
+    Returns:
+        a directed road map representing the inputted map
+    """
+    # Keying on the absolute path so the same file is cached once however it
+    # is named, and a relative name still finds the right file after a chdir
+    map_filename = os.path.abspath(map_filename)
+    return _load_map_version(map_filename, os.stat(map_filename).st_mtime_ns)
+
+
 # Testing load_map
 # road_map = load_map("maps/test_load_map.txt")
 # print(road_map)
@@ -86,12 +127,99 @@ def load_map(map_filename):
 # Objective func: travel time between specified start and end nodes on directed road map
 # Constraint(s): path found (if exists) must take least amount of total travel time
 
+def _bidirectional_dijkstra(out_start, road_dest, in_start, in_roads, road_src,
+                            road_times, source, target):
+    """
+    The search loop of find_optimal_path, on the arrays of a RoadMapIndex.
+    Runs Dijkstra forward from source and backward from target until the two
+    searches meet. Only ints, floats and flat arrays are used inside the loop.
+
+    Param:
+    out_start, road_dest, in_start, in_roads, road_src - the RoadMapIndex arrays
+        describing the roads out of and into each node id
+    road_times - array of float, the travel time of each road id, inf for
+        roads that cannot be traveled on
+    source - int, node id at which to start
+    target - int, node id at which to end, different from source
+
+    Returns:
+    A tuple (best_time, meeting_node, previous). best_time is the shortest
+    travel time from source to target, meeting_node the node id where the
+    searches met on that path, or inf and -1 if there is no path.
+    previous is a pair of arrays giving the previous node id (-1 if none) on the
+    path from source, and the next node id on the path to target.
+    """
+    n = len(out_start) - 1
+    # Each of these is a pair: index 0 belongs to the forward search from source
+    # along roads, index 1 to the backward search from target along reversed roads.
+    # Travel time to (or from) each node id found so far
+    time_to = (array('d', [float('inf')])*n, array('d', [float('inf')])*n)
+    # Previous node id on the best path found so far, in each search's direction
+    previous = (array('l', [-1])*n, array('l', [-1])*n)
+    visited = (bytearray(n), bytearray(n))
+    time_to[0][source], time_to[1][target] = 0.0, 0.0
+    # Min-heaps of (travel time, node id); ties fall back to comparing the int ids
+    queues = ([(0.0, source)], [(0.0, target)])
+    best_time, meeting_node = float('inf'), -1
+    while queues[0] and queues[1]:
+        # No path through an unvisited node can beat best_time once the two
+        # smallest queued travel times add up to at least best_time
+        if queues[0][0][0] + queues[1][0][0] >= best_time:
+            break
+        # Advancing whichever search has the closer frontier
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        current_time, current = heapq.heappop(queues[side])
+        # Skipping stale entries for nodes that were already reached faster
+        if visited[side][current]:
+            continue
+        visited[side][current] = 1
+        if side == 0:
+            road_ids = range(out_start[current], out_start[current+1])
+            neighbors = road_dest
+        else:
+            road_ids = in_roads[in_start[current]:in_start[current+1]]
+            neighbors = road_src
+        # Restricted roads have an inf travel time, so they never pass the check below
+        for road in road_ids:
+            alt_path_time = current_time + road_times[road]
+            neighbor = neighbors[road]
+            if alt_path_time < time_to[side][neighbor]:
+                time_to[side][neighbor] = alt_path_time
+                previous[side][neighbor] = current
+                heapq.heappush(queues[side], (alt_path_time, neighbor))
+                # Checking if the two searches now meet at neighbor on a faster path
+                if alt_path_time + time_to[1-side][neighbor] < best_time:
+                    best_time = alt_path_time + time_to[1-side][neighbor]
+                    meeting_node = neighbor
+    return best_time, meeting_node, previous
+
+
+def _build_path(index, previous, target):
+    """
+    Param:
+    index - RoadMapIndex the search was run on
+    previous - array giving the previous node id on the path to each node id (-1 if none)
+    target - int, node id at which the path ends
+
+    Returns:
+    A list of Nodes, the path from the search's start to target, found by
+    walking back through previous
+    """
+    path = deque()
+    current = target
+    while current != -1:
+        path.appendleft(index.nodes[current])
+        current = previous[current]
+    return list(path)
+
+
 def find_optimal_path(roadmap, start, end, restricted_roads, has_traffic=False):
     """
     Finds the shortest path between start and end nodes on the road map,
     without using any restricted roads,
     following traffic conditions.
-    Follows Dijkstra's algorithm.
+    Follows Dijkstra's algorithm, searching forward from start and backward
+    from end at the same time until the two searches meet.
 
     Param:
     roadmap - RoadMap
@@ -117,57 +245,384 @@ def find_optimal_path(roadmap, start, end, restricted_roads, has_traffic=False):
     # Checking for start node = end node to see if function body is necessary
     if start == end:
         return ([start], 0.0)
-    else:
-        # Marking all nodes in the road map as unvisited
-        unvisited = roadmap.get_all_nodes()
-        # Setting travel time to each node as inf, 0.0 for start node
-        time_to = {node: float('inf') for node in unvisited}
-        time_to[start] = 0.0
-        # Marking all nodes as not yet having a predecessor node in path
-        predecessor = {node: None for node in unvisited}
-        while unvisited:
-            # Setting current node as node with min travel time from start
-            current = min(unvisited, key=lambda node: time_to[node])
-            # Break out of loop if min travel time among unvisited nodes is inf
-            if time_to[current] == float('inf'):
+    index = roadmap.get_index()
+    if start not in index.node_ids or end not in index.node_ids:
+        return None
+    best_time, meeting_node, previous = _bidirectional_dijkstra(
+        index.out_start, index.road_dest, index.in_start, index.in_roads, index.road_src,
+        index.get_road_times(restricted_roads, has_traffic),
+        index.node_ids[start], index.node_ids[end])
+    # Return None if an optimal path from start -> end doesn't exist
+    if meeting_node == -1:
+        return None
+    # Assembling an optimal path from start to the meeting node, then on to end
+    best_path = _build_path(index, previous[0], meeting_node)
+    current = previous[1][meeting_node]
+    while current != -1:
+        best_path.append(index.nodes[current])
+        current = previous[1][current]
+    return (best_path, best_time)
+
+
+def _search(out_start, road_dest, road_times, source, targets, node_x=None, node_y=None, time_per_distance=0.0):
+    """
+    The search loop of find_optimal_path_astar and find_optimal_paths_from, on
+    the arrays of a RoadMapIndex. Runs Dijkstra from source until every node id
+    in targets has been reached for good, or nothing else is reachable.
+    With a time_per_distance above 0 this is A* search: nodes are taken in order
+    of travel time from source plus the estimate time_per_distance * straight-line
+    distance to the target, so targets must then hold a single node id;
+    raises a ValueError otherwise.
+
+    Param:
+    out_start, road_dest - the RoadMapIndex arrays describing the roads out of each node id
+    road_times - array of float, the travel time of each road id, inf for
+        roads that cannot be traveled on
+    source - int, node id at which to start
+    targets - set of int, node ids to find paths to
+    node_x, node_y - arrays of float, the coordinates of each node id, only used for A*
+    time_per_distance - float, scale of the estimate, which must never overestimate;
+        0 gives plain Dijkstra
+
+    Returns:
+    A tuple (time_to, previous) of arrays giving, for each node id, the travel
+    time from source (inf if not reached) and the previous node id on that path
+    (-1 if none). Both are exact for every node id in targets.
+    """
+    n = len(out_start) - 1
+    time_to = array('d', [float('inf')])*n
+    previous = array('l', [-1])*n
+    visited = bytearray(n)
+    time_to[source] = 0.0
+    # Flags for the target node ids, and how many of them are not final yet
+    is_target = bytearray(n)
+    for target in targets:
+        is_target[target] = 1
+    remaining = sum(is_target)
+    if time_per_distance:
+        if len(targets) != 1:
+            raise ValueError("A* search needs exactly one target node.")
+        goal = next(iter(targets))
+        target_x, target_y = node_x[goal], node_y[goal]
+    # Min-heap of (travel time + estimate, node id)
+    queue = [(0.0, source)]
+    # Stopping once the last target's travel time is final
+    while queue and remaining:
+        _, current = heapq.heappop(queue)
+        # Skipping stale entries for nodes that were already reached faster
+        if visited[current]:
+            continue
+        remaining -= is_target[current]
+        visited[current] = 1
+        current_time = time_to[current]
+        for road in range(out_start[current], out_start[current+1]):
+            alt_path_time = current_time + road_times[road]
+            neighbor = road_dest[road]
+            if alt_path_time < time_to[neighbor]:
+                time_to[neighbor] = alt_path_time
+                previous[neighbor] = current
+                if time_per_distance:
+                    alt_path_time += time_per_distance*math.hypot(node_x[neighbor] - target_x, node_y[neighbor] - target_y)
+                heapq.heappush(queue, (alt_path_time, neighbor))
+    return time_to, previous
+
+
+def find_optimal_path_astar(roadmap, start, end, restricted_roads, has_traffic=False):
+    """
+    Finds the shortest path between start and end nodes on the road map, like
+    find_optimal_path, but with A* search: the straight-line distance from each
+    node to end (see RoadMapIndex.get_time_per_distance) steers the search
+    towards end. Falls back to plain Dijkstra when some node has no coordinates.
+
+    Param:
+    roadmap - RoadMap
+        The graph on which to carry out the search
+    start - Node
+        node at which to start
+    end - Node
+        node at which to end
+    restricted_roads - list[string]
+        Road Types not allowed on path
+    has_traffic - boolean
+        flag to indicate whether to get shortest path during traffic or not
+
+    Returns:
+    A tuple of the form (best_path, best_time), as for find_optimal_path.
+
+    If there exists no path that satisfies constraints, then return None.
+    """
+    if start == end:
+        return ([start], 0.0)
+    index = roadmap.get_index()
+    if start not in index.node_ids or end not in index.node_ids:
+        return None
+    target = index.node_ids[end]
+    time_to, previous = _search(
+        index.out_start, index.road_dest, index.get_road_times(restricted_roads, has_traffic),
+        index.node_ids[start], {target},
+        index.node_x, index.node_y, index.get_time_per_distance(restricted_roads, has_traffic))
+    # Return None if an optimal path from start -> end doesn't exist
+    if previous[target] == -1:
+        return None
+    return (_build_path(index, previous, target), time_to[target])
+
+
+def find_optimal_paths_from(roadmap, start, ends, restricted_roads, has_traffic=False):
+    """
+    Finds the shortest paths from start to each of the ends nodes with a single
+    Dijkstra search, instead of one search per end node. Uses the same
+    constraints as find_optimal_path.
+
+    Param:
+    roadmap - RoadMap
+        The graph on which to carry out the search
+    start - Node
+        node at which to start
+    ends - list[Node]
+        nodes at which to end
+    restricted_roads - list[string]
+        Road Types not allowed on path
+    has_traffic - boolean
+        flag to indicate whether to get shortest paths during traffic or not
+
+    Returns:
+    A dictionary mapping each end node to a tuple (best_path, best_time) as
+    returned by find_optimal_path, or to None if there is no path to it.
+    """
+    index = roadmap.get_index()
+    if start not in index.node_ids:
+        return {end: ([start], 0.0) if end == start else None for end in ends}
+    source = index.node_ids[start]
+    targets = set(index.node_ids[end] for end in ends if end in index.node_ids)
+    time_to, previous = _search(index.out_start, index.road_dest,
+                                index.get_road_times(restricted_roads, has_traffic),
+                                source, targets)
+    optimal_paths = {}
+    for end in ends:
+        target = index.node_ids.get(end)
+        if target is None or time_to[target] == float('inf'):
+            optimal_paths[end] = None
+            continue
+        optimal_paths[end] = (_build_path(index, previous, target), time_to[target])
+    return optimal_paths
+
+
+class ContractionHierarchy():
+    """
+    A RoadMap preprocessed for fast repeated shortest path queries under one
+    set of constraints (restricted road types and traffic conditions).
+
+    Nodes are contracted one at a time, least important first: a contracted
+    node is taken out of the graph, and shortcut roads are added between its
+    neighbors wherever it was on their only shortest connection. A query then
+    only has to search "upward", towards nodes contracted later, from both
+    ends, which settles far fewer nodes than a plain Dijkstra search.
+    """
+
+    def __init__(self, roadmap, restricted_roads, has_traffic=False):
+        """
+        Contracts every node of roadmap. This takes far longer than a single
+        query, so it pays off when many queries are made on the same map.
+
+        Parameters:
+        roadmap - RoadMap to preprocess
+        restricted_roads - list[string], Road Types not allowed on any path
+        has_traffic - boolean, flag to indicate whether paths are found during traffic or not
+
+        Attributes:
+        self.nodes - list of Node, the node with each id (as in RoadMapIndex)
+        self.node_ids - dict of Node -> int, the id of each node
+        self.rank - list of int, the position of each node id in the contraction order
+        self.upward - list of dicts, upward[u] maps v to the travel time of the
+            road or shortcut u -> v, for every v contracted after u
+        self.downward - list of dicts, downward[v] maps u to the travel time of
+            the road or shortcut u -> v, for every u contracted after v
+        self.middle - dict of (int, int) -> int, for each shortcut u -> v,
+            the node id it was added for
+        """
+        index = roadmap.get_index()
+        road_times = index.get_road_times(restricted_roads, has_traffic)
+        self.nodes = index.nodes
+        self.node_ids = index.node_ids
+        n = len(self.nodes)
+        # The graph of nodes not contracted yet, keeping the fastest road between each pair
+        out_roads = [{} for _ in range(n)]
+        in_roads = [{} for _ in range(n)]
+        for road in range(len(road_times)):
+            src, dest, time = index.road_src[road], index.road_dest[road], road_times[road]
+            if src != dest and time < out_roads[src].get(dest, float('inf')):
+                out_roads[src][dest] = time
+                in_roads[dest][src] = time
+        self.rank = [0]*n
+        self.upward = [None]*n
+        self.downward = [None]*n
+        self.middle = {}
+        # Number of neighbors already contracted, so contractions spread out over the map
+        contracted_neighbors = [0]*n
+
+        def priority(node):
+            shortcuts = self._contract(out_roads, in_roads, node, False)
+            return shortcuts - len(in_roads[node]) - len(out_roads[node]) + contracted_neighbors[node]
+
+        queue = [(priority(node), node) for node in range(n)]
+        heapq.heapify(queue)
+        for rank in range(n):
+            # Priorities go stale as neighbors get contracted, so rechecking the
+            # popped node and putting it back if it is no longer the least important
+            while True:
+                _, node = heapq.heappop(queue)
+                current_priority = priority(node)
+                if not queue or current_priority <= queue[0][0]:
+                    break
+                heapq.heappush(queue, (current_priority, node))
+            self._contract(out_roads, in_roads, node, True)
+            self.rank[node] = rank
+            self.upward[node] = out_roads[node]
+            self.downward[node] = in_roads[node]
+            for neighbor in in_roads[node]:
+                del out_roads[neighbor][node]
+                contracted_neighbors[neighbor] += 1
+            for neighbor in out_roads[node]:
+                del in_roads[neighbor][node]
+                contracted_neighbors[neighbor] += 1
+
+    def _contract(self, out_roads, in_roads, node, add_shortcuts):
+        """
+        Finds the shortcuts needed to take node out of the remaining graph: one
+        for each pair of neighbors u -> node -> w with no other path from u to w
+        that is as fast (a witness path).
+
+        Parameters:
+        out_roads, in_roads - lists of dicts, the remaining graph
+        node - int, node id to contract
+        add_shortcuts - bool, True to add the shortcuts to the remaining graph,
+            False to only count them
+
+        Returns:
+        int, the number of shortcuts needed
+        """
+        shortcuts = 0
+        for src, time_in in in_roads[node].items():
+            via_times = {dest: time_in + time_out for dest, time_out in out_roads[node].items() if dest != src}
+            if not via_times:
+                continue
+            witness_times = self._witness_search(out_roads, src, node, max(via_times.values()))
+            for dest, via_time in via_times.items():
+                if witness_times.get(dest, float('inf')) > via_time:
+                    shortcuts += 1
+                    if add_shortcuts:
+                        out_roads[src][dest] = via_time
+                        in_roads[dest][src] = via_time
+                        self.middle[(src, dest)] = node
+        return shortcuts
+
+    def _witness_search(self, out_roads, source, avoid, max_time, max_settled=50):
+        """
+        Runs a bounded Dijkstra search from source in the remaining graph,
+        without passing through avoid. Stops past max_time or after settling
+        max_settled nodes, so some witness paths may be missed; that only adds
+        unneeded shortcuts, never wrong ones.
+
+        Returns:
+        dict of int -> float, travel times of paths found from source to each node id
+        """
+        time_to = {source: 0.0}
+        visited = set()
+        queue = [(0.0, source)]
+        while queue and len(visited) < max_settled:
+            current_time, current = heapq.heappop(queue)
+            if current_time > max_time:
                 break
-            # Checking each road beginning at current node
-            for road in roadmap.get_reachable_roads_from_node(current, restricted_roads):
-                # Calculating travel time from current node to dest node through road
-                alt_path_time = time_to[current] + road.get_travel_time(has_traffic)
-                # Updating path travel time to dest node if newly calculated
-                # travel time through current is less than saved travel time 
-                if alt_path_time < time_to[road.get_destination_node()]:
-                    time_to[road.get_destination_node()] = alt_path_time
-                    # Update predecessor for dest node according to
-                    # newly calculated path w/ shorter travel time
-                    predecessor[road.get_destination_node()] = current
-            # Marking current node as visited
-            unvisited.remove(current)
-        try:
-            # Assembling an optimal path from end to start using predecessor
-            best_path = []
-            current = end
-            while predecessor[current] != None:
-                best_path.insert(0, current)
-                current = predecessor[current]
-            if best_path != []:
-                best_path.insert(0, current)
-            # Return None if an optimal path from start -> end doesn't exist
-            else:
-                return None
-            # Set best time to shortest calculated travel time from start to end
-            best_time = time_to[end]
-            return (best_path, best_time)
-        except KeyError:
+            if current in visited:
+                continue
+            visited.add(current)
+            for neighbor, time in out_roads[current].items():
+                alt_path_time = current_time + time
+                if neighbor != avoid and alt_path_time < time_to.get(neighbor, float('inf')):
+                    time_to[neighbor] = alt_path_time
+                    heapq.heappush(queue, (alt_path_time, neighbor))
+        return time_to
+
+    def find_optimal_path(self, start, end):
+        """
+        Finds the shortest path between start and end nodes, under the
+        constraints the hierarchy was built with. Searches upward from start
+        and from end, and unpacks the shortcuts on the best path found.
+
+        Param:
+        start - Node, node at which to start
+        end - Node, node at which to end
+
+        Returns:
+        A tuple of the form (best_path, best_time), as for find_optimal_path.
+
+        If there exists no path that satisfies constraints, then return None.
+        """
+        if start == end:
+            return ([start], 0.0)
+        if start not in self.node_ids or end not in self.node_ids:
             return None
-    
+        source, target = self.node_ids[start], self.node_ids[end]
+        # Pairs as in find_optimal_path: index 0 searches upward from start
+        # along roads, index 1 upward from end along reversed roads
+        graphs = (self.upward, self.downward)
+        time_to = ({source: 0.0}, {target: 0.0})
+        previous = ({source: -1}, {target: -1})
+        visited = (set(), set())
+        queues = ([(0.0, source)], [(0.0, target)])
+        best_time, meeting_node = float('inf'), -1
+        while queues[0] or queues[1]:
+            side = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            current_time, current = heapq.heappop(queues[side])
+            # Neither search can improve on best_time past this point in its queue
+            if current_time >= best_time:
+                queues[side].clear()
+                continue
+            if current in visited[side]:
+                continue
+            visited[side].add(current)
+            if current in time_to[1-side] and current_time + time_to[1-side][current] < best_time:
+                best_time = current_time + time_to[1-side][current]
+                meeting_node = current
+            for neighbor, time in graphs[side][current].items():
+                alt_path_time = current_time + time
+                if alt_path_time < time_to[side].get(neighbor, float('inf')):
+                    time_to[side][neighbor] = alt_path_time
+                    previous[side][neighbor] = current
+                    heapq.heappush(queues[side], (alt_path_time, neighbor))
+        # Return None if an optimal path from start -> end doesn't exist
+        if meeting_node == -1:
+            return None
+        # Listing the node ids along the path in the hierarchy, shortcuts included
+        hierarchy_path = deque()
+        current = meeting_node
+        while current != -1:
+            hierarchy_path.appendleft(current)
+            current = previous[0][current]
+        current = previous[1][meeting_node]
+        while current != -1:
+            hierarchy_path.append(current)
+            current = previous[1][current]
+        # Replacing each shortcut by the two roads (or shortcuts) it stands for
+        best_path = [self.nodes[source]]
+        for i in range(len(hierarchy_path) - 1):
+            pending = [(hierarchy_path[i], hierarchy_path[i+1])]
+            while pending:
+                src, dest = pending.pop()
+                if (src, dest) in self.middle:
+                    middle = self.middle[(src, dest)]
+                    pending.append((middle, dest))
+                    pending.append((src, middle))
+                else:
+                    best_path.append(self.nodes[dest])
+        return (best_path, best_time)
+
 
 def find_optimal_path_no_traffic(filename, start, end):
     """
     Finds the shortest path from start to end during conditions of no traffic.
 
-    Uses find_optimal_path and load_map.
+    Uses find_optimal_path and load_map (through _load_map_cached).
 
     Param:
     filename - name of the map file that contains the graph
@@ -178,8 +633,8 @@ def find_optimal_path_no_traffic(filename, start, end):
     list of Node objects, the shortest path from start to end in normal traffic.
     If there exists no path, then return None.
     """
-    # Creating the road map from map file
-    road_map = load_map(filename)
+    # Getting the road map for the map file, parsed once per version of the file
+    road_map = _load_map_cached(filename)
     # Call to find_optimal_path with no restricted roads, no traffic
     optimal_path_and_time = find_optimal_path(road_map, start, end, [])
     return optimal_path_and_time[0]
@@ -189,7 +644,7 @@ def find_optimal_path_restricted(filename, start, end):
     """
     Finds the shortest path from start to end when local roads and hill roads cannot be used.
 
-    Uses find_optimal_path and load_map.
+    Uses find_optimal_path and load_map (through _load_map_cached).
 
     Param:
     filename - name of the map file that contains the graph
@@ -200,8 +655,8 @@ def find_optimal_path_restricted(filename, start, end):
     list of Node objects, the shortest path from start to end given the aforementioned conditions,
     If there exists no path that satisfies constraints, then return None.
     """
-    # Creating the road map from map file
-    road_map = load_map(filename)
+    # Getting the road map for the map file, parsed once per version of the file
+    road_map = _load_map_cached(filename)
     # Call to find_optimal_path with local/hill roads restricted, no traffic
     optimal_path_and_time = find_optimal_path(road_map, start, end, ['local', 'hill'])
     return optimal_path_and_time[0]
@@ -212,7 +667,7 @@ def find_optimal_path_in_traffic_no_toll(filename, start, end):
     Finds the shortest path from start to end when toll roads cannot be used and in traffic,
     i.e. when all roads' travel times are multiplied by their traffic multipliers.
 
-    Uses find_optimal_path and load_map.
+    Uses find_optimal_path and load_map (through _load_map_cached).
 
     Param:
     filename - name of the map file that contains the graph
@@ -225,15 +680,65 @@ def find_optimal_path_in_traffic_no_toll(filename, start, end):
 
     If there exists no path that satisfies the constraints, then return None.
     """
-    # Creating the road map from map file
-    road_map = load_map(filename)
+    # Getting the road map for the map file, parsed once per version of the file
+    road_map = _load_map_cached(filename)
     # Call to find_optimal_path with toll roads restricted and traffic
     optimal_path_and_time = find_optimal_path(road_map, start, end, ['toll'], True)
     return optimal_path_and_time[0]
     
 
 
+def _find_optimal_path_in_file(filename, start, end, restricted_roads, has_traffic):
+    """
+    Runs one find_optimal_path query on the map in filename. Used by
+    find_optimal_paths_batch in worker processes, where _load_map_cached
+    makes each process parse the map file only once.
+    """
+    return find_optimal_path(_load_map_cached(filename), start, end, restricted_roads, has_traffic)
+
+
+# Fewest queries each worker process should get in find_optimal_paths_batch,
+# so the work makes up for the process starting up and loading the map again
+_MIN_QUERIES_PER_PROCESS = 32
+
+
+def find_optimal_paths_batch(filename, queries, restricted_roads=None, has_traffic=False, max_workers=None):
+    """
+    Finds the shortest path for each (start, end) pair in queries, spreading
+    the independent searches over several processes. Batches too small to
+    be worth starting processes for are run in this process.
+
+    Uses find_optimal_path and load_map (through _load_map_cached).
+
+    Param:
+    filename - name of the map file that contains the graph
+    queries - list of (Node, Node) tuples, the start and end node of each query
+    restricted_roads - list[string], Road Types not allowed on any path, defaults to none
+    has_traffic - boolean, flag to indicate whether to get shortest paths during traffic or not
+    max_workers - int, the number of processes to use, defaults to the number of CPUs
+
+    Returns:
+    A list with, for each query in order, a tuple (best_path, best_time) as
+    returned by find_optimal_path, or None if there exists no path.
+    """
+    if restricted_roads is None:
+        restricted_roads = []
+    n = len(queries)
+    workers = min(max_workers or os.cpu_count() or 1, n // _MIN_QUERIES_PER_PROCESS)
+    if workers <= 1:
+        roadmap = _load_map_cached(filename)
+        return [find_optimal_path(roadmap, start, end, restricted_roads, has_traffic)
+                for start, end in queries]
+    starts, ends = zip(*queries)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Sending queries in chunks to cut down on inter-process round trips
+        chunksize = max(1, n // (4*workers))
+        return list(executor.map(_find_optimal_path_in_file, [filename]*n, starts, ends,
+                                 [restricted_roads]*n, [has_traffic]*n, chunksize=chunksize))
+
+
 if __name__ == '__main__':
+    pass
 
     # rmap = load_map('./maps/small_map.txt')
 
@@ -45,14 +45,14 @@ class State():
         Returns: 
         int, difference in votes cast between the two parties, a positive number
         """
-        return abs(int(self.dem)-int(self.rep))
+        return abs(self.dem-self.rep)
 
     def get_winner(self):
         """
         Returns:
         str, the winner of the state, "dem" or "rep"
         """
-        if int(self.dem)-int(self.rep) > 0:
+        if self.dem > self.rep:
             return "dem"
         else:
             return "rep"